@@ -2,14 +2,17 @@ import os
 import re
 import json
 import time
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 from urllib.parse import quote
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
 import folium
 from streamlit_folium import st_folium
 from dotenv import load_dotenv
@@ -21,208 +24,535 @@ load_dotenv()
 # ===========================
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-llm = ChatGroq(
-    temperature=0.6,
-    groq_api_key=GROQ_API_KEY,
-    model_name="llama-3.3-70b-versatile"
-)
+_FENCE_RE = re.compile(r"```(?:json)?")
 
 st.set_page_config(page_title="AI Travel Planner Agent", page_icon="🌍", layout="wide")
 
+
+@st.cache_resource
+def get_llm():
+    return ChatGroq(
+        temperature=0.6,
+        groq_api_key=GROQ_API_KEY,
+        model_name="llama-3.3-70b-versatile"
+    )
+
+
+# ===========================
+# PROMPTS
+# ===========================
+# System messages stay fixed so the provider can reuse the cached prompt prefix;
+# per-trip details only ever appear in the human turn.
+@st.cache_resource
+def get_itinerary_prompt():
+    return ChatPromptTemplate.from_messages([
+        (
+            "system",
+            """
+            You are a professional **travel planner and local guide**. 
+            Create a **realistic, well-paced travel itinerary** for the requested city and trip length, 
+            tailored to the traveler's **interests**.
+
+            ### Guidelines:
+            1. **Realism & Local Knowledge**
+            - Use **real, well-known locations** and verified attractions in the city.
+            - Avoid generic names or fictional places.
+            - Reflect the **local culture, geography, and travel flow**.
+            - Consider **opening hours**, **peak times**, and **local customs** 
+                (e.g., lunch around 1 PM, dinner after 7 PM, markets closing by 9 PM).
+
+            2. **Daily Schedule Structure**
+            - Start around **8:00–9:00 AM** and end by **9:00–10:00 PM**.
+            - Include **3–5 key activities per day**, balanced between sightseeing, food, rest, and exploration.
+            - Ensure the **route is geographically logical** (no back-and-forth across the city).
+            - Add short **travel breaks or meal stops** between activities.
+
+            3. **Activity Details (Mandatory Fields)**
+            Each activity must include:
+            - `"time"`: realistic local time (e.g., "10:30 AM")
+            - `"place_name"`: specific location (museum, park, restaurant, etc.)
+            - `"category"`: one of ["Sightseeing", "Food", "Shopping", "Culture", "Nature", "Nightlife", "Adventure"]
+            - `"description"`: 3–4 sentences describing what to see/do and why it fits the traveler's interests
+
+            4. **Notes Per Day**
+            Add a `"notes"` field with short, useful local advice such as:
+            - Best transport method or ticket info
+            - Weather or clothing tips
+            - Cultural etiquette or timing suggestions
+
+            5. **Output Format**
+            Return output as **strictly valid JSON only**, in this structure:
+            [
+                {{
+                    "day": 1,
+                    "activities": [
+                        {{
+                            "time": "09:00 AM",
+                            "place_name": "Gateway of India",
+                            "category": "Sightseeing",
+                            "description": "Start your trip at the historic monument overlooking the Arabian Sea..."
+                        }},
+                        ...
+                    ],
+                    "notes": "Use a ferry pass early to avoid queues; great photo spot at sunrise."
+                }},
+                ...
+            ]
+
+            6. **Rules**
+            - DO NOT include any text, commentary, or markdown outside the JSON.
+            - Avoid repeating places across days unless they serve a new purpose (e.g., a different restaurant in the same area).
+            - The final itinerary should feel **authentic, local, and logically ordered**.
+
+            7. **Self-Check**
+            - Before emitting the JSON, silently review it for logical flow, realism, and accurate place naming.
+            - Output only the corrected JSON.
+            """
+
+        ),
+        ("human", "Plan a {days}-day trip to {city} with interests: {interests}. Return JSON per the schema above.")
+    ], template_format="f-string")
+
+
 # ===========================
 # HELPERS
 # ===========================
+@st.cache_resource
+def get_http_session():
+    """Shared keep-alive session so repeated requests reuse pooled connections"""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+    session.headers.update({"User-Agent": "travel-planner/1.0"})
+    return session
+
+
+def _find_json_end(text, start):
+    """Return the index of the bracket closing text[start], or -1 if it never closes"""
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
 def parse_llm_json(text):
-    cleaned = re.sub(r"```(?:json)?", "", text)
-    cleaned = cleaned.replace("```", "").strip()
+    s = text.strip()
+    # Fast path: the response is already bare JSON
+    if s.startswith(("{", "[")):
+        try:
+            return json.loads(s)
+        except ValueError:
+            pass
+
+    # JSON wrapped in prose or code fences: slice out the first balanced block
+    starts = [i for i in (s.find("["), s.find("{")) if i != -1]
+    if starts:
+        start = min(starts)
+        end = _find_json_end(s, start)
+        if end != -1:
+            try:
+                return json.loads(s[start:end + 1])
+            except ValueError:
+                pass
+
+    fallback = [{"day": 1, "activities": [{"time": "All day", "place_name": "Unknown", "description": text}], "notes": ""}]
+    cleaned = _FENCE_RE.sub("", text).strip()
+    # Prose like "I cannot..." is never JSON; don't bother the parser with it
+    if not cleaned or cleaned[0] not in "[{":
+        return fallback
     try:
         return json.loads(cleaned)
     except Exception:
-        return [{"day": 1, "activities": [{"time": "All day", "place_name": "Unknown", "description": text}], "notes": ""}]
+        return fallback
+
+
+def _new_scan_state():
+    return {"pos": 0, "start": -1, "depth": 0, "in_string": False, "escaped": False}
+
+
+def _pop_complete_days(buffer, state):
+    """Return the raw text of every day object closed since the last call.
+
+    state carries the scan position and bracket/string state between calls,
+    so each streamed character is examined only once.
+    """
+    days = []
+    start = state["start"]
+    depth = state["depth"]
+    in_string = state["in_string"]
+    escaped = state["escaped"]
+    for i in range(state["pos"], len(buffer)):
+        ch = buffer[i]
+        if start == -1:
+            # Between days: skip the outer "[", commas, fences and prose
+            if ch == "{":
+                start = i
+                depth = 1
+        elif in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth == 0:
+                days.append(buffer[start:i + 1])
+                start = -1
+    state.update(pos=len(buffer), start=start, depth=depth, in_string=in_string, escaped=escaped)
+    return days
+
+
+def _placeholder_day(day_number, description):
+    return {
+        "day": day_number,
+        "activities": [{"time": "All Day", "place_name": "Unknown", "category": "Sightseeing", "description": description}],
+        "notes": ""
+    }
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _fetch_weather(city):
+    # Errors propagate so a transient failure is never cached
+    url = f"https://wttr.in/{quote(city)}?format=j1"
+    data = get_http_session().get(url, timeout=5).json()
+    cond = data["current_condition"][0]
+    desc = cond["weatherDesc"][0]["value"]
+    temp = cond["temp_C"]
+    return f"{desc}, {temp}°C"
 
 
 def get_weather(city):
     try:
-        url = f"https://wttr.in/{quote(city)}?format=j1"
-        data = requests.get(url, timeout=5).json()
-        cond = data["current_condition"][0]
-        desc = cond["weatherDesc"][0]["value"]
-        temp = cond["temp_C"]
-        return f"{desc}, {temp}°C"
+        return _fetch_weather(city)
     except Exception:
         return "Weather data unavailable"
 
 
-def review_itinerary(itinerary_json):
-    review_prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a travel expert. Review and fix the following itinerary for realism, logical flow, and accurate place naming."),
-        ("human", f"Here is the itinerary:\n{json.dumps(itinerary_json, indent=2)}")
-    ])
-    try:
-        response = llm.invoke(review_prompt.format_messages())
-        revised = parse_llm_json(response.content)
-        return revised if isinstance(revised, list) else itinerary_json
-    except Exception:
-        return itinerary_json
+@st.cache_resource
+def get_geocoder():
+    """Single Nominatim geocoder shared across reruns"""
+    return Nominatim(user_agent="travel_planner_v2")
+
 
+@st.cache_resource
+def get_nominatim_throttle():
+    """Start-time slots for Nominatim requests, shared by every session and rerun"""
+    return {"lock": threading.Lock(), "next_slot": 0.0}
 
 
-def create_itinerary(city, days, interests):
-    prompt = ChatPromptTemplate.from_messages([
-    (
-        "system",
-        """
-        You are a professional **travel planner and local guide**. 
-        Create a **realistic, well-paced {days}-day travel itinerary** for **{city}**, 
-        tailored to the traveler's **interests**: {interests}.
-
-        ### Guidelines:
-        1. **Realism & Local Knowledge**
-        - Use **real, well-known locations** and verified attractions in {city}.
-        - Avoid generic names or fictional places.
-        - Reflect the **local culture, geography, and travel flow**.
-        - Consider **opening hours**, **peak times**, and **local customs** 
-            (e.g., lunch around 1 PM, dinner after 7 PM, markets closing by 9 PM).
-
-        2. **Daily Schedule Structure**
-        - Start around **8:00–9:00 AM** and end by **9:00–10:00 PM**.
-        - Include **3–5 key activities per day**, balanced between sightseeing, food, rest, and exploration.
-        - Ensure the **route is geographically logical** (no back-and-forth across the city).
-        - Add short **travel breaks or meal stops** between activities.
-
-        3. **Activity Details (Mandatory Fields)**
-        Each activity must include:
-        - `"time"`: realistic local time (e.g., "10:30 AM")
-        - `"place_name"`: specific location (museum, park, restaurant, etc.)
-        - `"category"`: one of ["Sightseeing", "Food", "Shopping", "Culture", "Nature", "Nightlife", "Adventure"]
-        - `"description"`: 3–4 sentences describing what to see/do and why it fits {interests}
-
-        4. **Notes Per Day**
-        Add a `"notes"` field with short, useful local advice such as:
-        - Best transport method or ticket info
-        - Weather or clothing tips
-        - Cultural etiquette or timing suggestions
-
-        5. **Output Format**
-        Return output as **strictly valid JSON only**, in this structure:
-        [
-            {{
-                "day": 1,
-                "activities": [
-                    {{
-                        "time": "09:00 AM",
-                        "place_name": "Gateway of India",
-                        "category": "Sightseeing",
-                        "description": "Start your trip at the historic monument overlooking the Arabian Sea..."
-                    }},
-                    ...
-                ],
-                "notes": "Use a ferry pass early to avoid queues; great photo spot at sunrise."
-            }},
-            ...
-        ]
-
-        6. **Rules**
-        - DO NOT include any text, commentary, or markdown outside the JSON.
-        - Avoid repeating places across days unless they serve a new purpose (e.g., a different restaurant in the same area).
-        - The final itinerary should feel **authentic, local, and logically ordered**.
-        """
-
-    ),
-    ("human", "Generate the itinerary.")
-    ],template_format="f-string")
-
-    response = llm.invoke(prompt.format_messages(city=city, days=days, interests=interests))
-    itinerary_json = parse_llm_json(response.content)
+def _wait_for_nominatim_slot():
+    # Nominatim usage policy: at most 1 request per second. Only the slot
+    # reservation is serialized, so in-flight requests can still overlap.
+    throttle = get_nominatim_throttle()
+    with throttle["lock"]:
+        now = time.monotonic()
+        slot = max(now, throttle["next_slot"])
+        throttle["next_slot"] = slot + 1
+    time.sleep(slot - now)
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _geocode(query):
+    # Only cache misses reach Nominatim
+    _wait_for_nominatim_slot()
+    loc = get_geocoder().geocode(query)
+    return (loc.latitude, loc.longitude) if loc else None
+
+
+@functools.lru_cache(maxsize=1024)
+def geocode_location(query):
+    """Return (lat, lon) for a query, or None if it can't be found"""
+    return _geocode(query)
+
+
+def geocode_places(queries):
+    """Geocode several queries concurrently, returning {query: (lat, lon) or None}"""
+    def safe_geocode(query):
+        try:
+            return geocode_location(query)
+        except Exception:
+            return None
+
+    unique = list(dict.fromkeys(queries))
+    if not unique:
+        return {}
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        return dict(zip(unique, ex.map(safe_geocode, unique)))
+
+
+def geocode_itinerary(itinerary, city):
+    """Geocode every distinct place in the itinerary in one pass, keyed by (place, city)"""
+    places = {
+        (act["place_name"], city)
+        for day in itinerary
+        for act in day.get("activities", [])
+        if act.get("place_name")
+    }
+    # The city itself rides along so the map centre lookup is warm too
+    results = geocode_places([city] + [f"{place}, {c}" for place, c in places])
+    return {(place, c): results.get(f"{place}, {c}") for place, c in places}
+
+
+ITINERARY_CACHE_TTL = 3600
+
+
+@st.cache_resource
+def get_itinerary_cache():
+    """Generated itineraries shared across sessions: {(city, days, interests_key): (created_at, days)}"""
+    return {}
+
+
+def _is_day(obj):
+    return isinstance(obj, dict) and isinstance(obj.get("activities"), list)
+
+
+def _unpack_days(obj):
+    """Return (day, ok) pairs for a parsed object; ok is True only for real day objects"""
+    if _is_day(obj):
+        return [(obj, True)]
+    # Wrappers like {"itinerary": [...]} carry the days under a single list key
+    lists = [v for v in obj.values() if isinstance(v, list)] if isinstance(obj, dict) else []
+    if len(lists) == 1 and lists[0] and all(_is_day(d) for d in lists[0]):
+        return [(d, True) for d in lists[0]]
+    return [(obj, False)]
+
+
+def _stream_itinerary(city, days, interests_key):
+    """Yield (day, ok) pairs from the LLM as soon as each day object closes.
+
+    ok is False for anything that isn't a well-formed day: placeholders for
+    malformed or truncated output, and parsed objects without activities.
+    """
+    buffer = ""
+    state = _new_scan_state()
+    count = 0
+    for chunk in get_llm().stream(get_itinerary_prompt().format_messages(city=city, days=days, interests=interests_key)):
+        buffer += chunk.content
+        for raw in _pop_complete_days(buffer, state):
+            try:
+                parsed = _unpack_days(json.loads(raw))
+            except ValueError:
+                parsed = [(_placeholder_day(count + 1, raw), False)]
+            for day, ok in parsed:
+                count += 1
+                yield day, ok
+
+    if state["start"] != -1:
+        # The stream ended in the middle of a day
+        count += 1
+        yield _placeholder_day(count, buffer[state["start"]:]), False
+    if count:
+        return
+
+    itinerary_json = parse_llm_json(buffer)
 
     # ✅ Ensure output is a list of dicts
     if isinstance(itinerary_json, dict):
         itinerary_json = [itinerary_json]
     elif isinstance(itinerary_json, str):
-        itinerary_json = [{
-            "day": 1,
-            "activities": [{"time": "All Day", "place_name": "Unknown", "category": "Sightseeing", "description": itinerary_json}],
-            "notes": ""
-        }]
+        itinerary_json = [_placeholder_day(1, itinerary_json)]
     elif not isinstance(itinerary_json, list):
-        itinerary_json = [{
-            "day": 1,
-            "activities": [{"time": "All Day", "place_name": "Unknown", "category": "Sightseeing", "description": "Invalid response format."}],
-            "notes": ""
-        }]
-
-    # Add weather safely
-    weather = get_weather(city)
+        itinerary_json = [_placeholder_day(1, "Invalid response format.")]
+
+    # Nothing streamed as a day object, so this is at best a fallback
     for day in itinerary_json:
+        yield day, False
+
+
+def create_itinerary(city, days, interests, on_day=None):
+    """Generate the itinerary, calling on_day(day) for each day as it becomes ready"""
+    # Same interests in any order/case share one cache entry
+    interests_key = ",".join(sorted(i.strip().lower() for i in interests.split(",") if i.strip()))
+    # Fetch weather alongside the LLM stream rather than ahead of it
+    weather_pool = ThreadPoolExecutor(max_workers=1)
+    weather_future = weather_pool.submit(get_weather, city)
+    weather_pool.shutdown(wait=False)
+    itinerary_json = []
+
+    def add_day(day):
+        # Copy so weather notes never leak into the cached itinerary
         if isinstance(day, dict):
+            weather = weather_future.result()
+            day = dict(day)
             day["notes"] = (day.get("notes", "") + f" | Weather: {weather}").strip(" |")
+        itinerary_json.append(day)
+        if on_day:
+            on_day(day)
+
+    cache = get_itinerary_cache()
+    key = (city, days, interests_key)
+    now = time.time()
+    cached = cache.get(key)
+    if cached and now - cached[0] < ITINERARY_CACHE_TTL:
+        for day in cached[1]:
+            add_day(day)
+        return itinerary_json
 
-    # Review and clean
-    itinerary_json = review_itinerary(itinerary_json)
+    generated = []
+    complete = True
+    for day, ok in _stream_itinerary(city, days, interests_key):
+        complete = complete and ok
+        generated.append(day)
+        add_day(day)
+
+    # Only keep clean responses, so one bad generation isn't served for an hour
+    if complete and generated:
+        for stale_key, (created_at, _) in list(cache.items()):
+            if now - created_at >= ITINERARY_CACHE_TTL:
+                cache.pop(stale_key, None)
+        cache[key] = (now, generated)
     return itinerary_json
 
 
 # ===========================
-# ✨ DISPLAY HELPERS (Side-by-Side Layout)
+# ✨ DISPLAY HELPERS
 # ===========================
-def display_itinerary_day(day, city):
-    """Display itinerary for one day"""
-    st.markdown(f"### 📅 Day {day.get('day', '?')}")
-    for act in day.get("activities", []):
+_ITINERARY_CARD_TEMPLATE = """
+<div style="margin-bottom: 10px; padding: 10px; border-radius: 10px; background-color: #f8f9fa;">
+    <b>🕒 {time_slot}</b> — <a href="{maps_url}" target="_blank"><b>{place}</b></a><br>
+    <span style="color: #555;">{desc}</span><br>
+    <i style="color: #007bff;">Category: {category}</i>
+</div>
+"""
+
+_DAY_CARD_TEMPLATE = """
+<div style="
+    background-color: #1e1e1e;
+    border-radius: 12px;
+    padding: 16px;
+    margin-bottom: 15px;
+    border: 1px solid #333;
+">
+    <div style="color: #bbb; font-size: 13px;">🕒 {time_slot}</div>
+    <div style="font-size: 17px; font-weight: 600; margin-top: 2px;">
+        <a href="{maps_url}" target="_blank" style="color: #4da3ff; text-decoration: none;">
+            {place}
+        </a>
+    </div>
+    <div style="color: #ccc; margin-top: 5px;">{desc}</div>
+    <div style="color: #00bfff; font-size: 13px; margin-top: 5px;">
+        🏷️ {category}
+    </div>
+</div>
+"""
+
+
+@st.cache_resource
+def get_maps_url_builder():
+    """Memoized Google Maps search URL builder that survives reruns"""
+    @functools.lru_cache(maxsize=4096)
+    def maps_url(place, city):
+        return f"https://www.google.com/maps/search/?api=1&query={quote(f'{place}, {city}')}"
+    return maps_url
+
+
+def _render_cards(template, activities, city):
+    """Build all activity cards as one HTML block so they go out in a single st.markdown"""
+    maps_url = get_maps_url_builder()
+    cards = []
+    for act in activities:
         place = act.get("place_name", "Unknown Place")
-        time_slot = act.get("time", "")
-        desc = act.get("description", "")
-        category = act.get("category", "")
+        cards.append(template.format(
+            time_slot=act.get("time", ""),
+            maps_url=maps_url(place, city),
+            place=place,
+            desc=act.get("description", ""),
+            category=act.get("category", "")
+        ))
+    return "".join(cards)
 
-        maps_url = f"https://www.google.com/maps/search/?api=1&query={quote(place + ', ' + city)}"
 
-        st.markdown(
-            f"""
-            <div style="margin-bottom: 10px; padding: 10px; border-radius: 10px; background-color: #f8f9fa;">
-                <b>🕒 {time_slot}</b> — <a href="{maps_url}" target="_blank"><b>{place}</b></a><br>
-                <span style="color: #555;">{desc}</span><br>
-                <i style="color: #007bff;">Category: {category}</i>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
+def display_itinerary_day(day, city):
+    """Display itinerary for one day"""
+    st.markdown(f"### 📅 Day {day.get('day', '?')}")
+    st.markdown(_render_cards(_ITINERARY_CARD_TEMPLATE, day.get("activities", []), city), unsafe_allow_html=True)
 
     if day.get("notes"):
         st.info(f"💡 {day['notes']}")
     st.divider()
 
 
-def display_map_day(day, city):
-    """Display map for one day"""
-    geolocator = Nominatim(user_agent="travel_planner_v2")
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
+def build_itinerary_map(itinerary, city, coords):
+    """Build one folium map with a toggleable marker layer per day"""
     colors = ["red", "blue", "green", "purple", "orange", "darkred", "cadetblue"]
 
     try:
-        city_loc = geocode(city)
-        fmap = folium.Map(location=[city_loc.latitude, city_loc.longitude], zoom_start=12)
+        city_lat, city_lon = geocode_location(city)
+        fmap = folium.Map(location=[city_lat, city_lon], zoom_start=12)
     except:
         fmap = folium.Map(location=[19.0760, 72.8777], zoom_start=12)
 
-    for act in day.get("activities", []):
-        place = act.get("place_name", "")
-        desc = act.get("description", "")
-        if not place:
-            continue
-
-        try:
-            loc = geocode(f"{place}, {city}")
+    for i, day in enumerate(itinerary):
+        fg = folium.FeatureGroup(name=f"Day {day.get('day', '?')}", show=True).add_to(fmap)
+        for act in day.get("activities", []):
+            place = act.get("place_name", "")
+            desc = act.get("description", "")
+            loc = coords.get((place, city))
             if loc:
                 folium.Marker(
-                    [loc.latitude, loc.longitude],
+                    list(loc),
                     popup=folium.Popup(f"<b>{place}</b><br>{desc}", max_width=250),
                     tooltip=place,
-                    icon=folium.Icon(color=colors[(day["day"] - 1) % len(colors)], icon="map-marker")
-                ).add_to(fmap)
-        except:
-            continue
+                    icon=folium.Icon(color=colors[i % len(colors)], icon="map-marker")
+                ).add_to(fg)
+
+    folium.LayerControl().add_to(fmap)
+    return fmap
+
 
-    st.components.v1.html(fmap._repr_html_(), height=500)
+def display_day(day, city):
+    """Display one day's itinerary"""
+    st.markdown(
+        f"""
+        <div style="margin-top: 40px;">
+            <h2 style="font-size: 28px; font-weight: 700;">🥇 Day {day.get('day', '?')}</h2>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+    st.markdown(_render_cards(_DAY_CARD_TEMPLATE, day.get("activities", []), city), unsafe_allow_html=True)
+
+    if day.get("notes"):
+        st.markdown(
+            f"""
+            <div style="
+                background-color: #102A43;
+                border-left: 5px solid #00BFFF;
+                color: #E6F1FF;
+                padding: 12px;
+                border-radius: 10px;
+                margin-top: 10px;
+            ">
+                💡 {day['notes']}
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+
+    st.markdown("---")
 
 
 # ===========================
@@ -244,75 +574,20 @@ if st.button("✨ Generate My Itinerary", use_container_width=True):
     if not city.strip():
         st.error("❌ Please enter a valid city name.")
     else:
+        status = st.empty()
+        st.markdown("---")
+        map_slot = st.empty()
+
+        # Render each day as soon as it is generated
         with st.spinner(f"Creating your {days}-day plan for {city}..."):
-            itinerary = create_itinerary(city, days, interests)
+            itinerary = create_itinerary(city, days, interests, on_day=lambda day: display_day(day, city))
 
-        st.success(f"🎉 Your {days}-day itinerary for **{city}** is ready!")
-        st.markdown("---")
+        # One map for the whole trip, filled in once every place is geocoded together
+        with st.spinner("Pinning places on the map..."):
+            coords = geocode_itinerary(itinerary, city)
+            fmap = build_itinerary_map(itinerary, city, coords)
+            with map_slot.container():
+                st_folium(fmap, height=600, width=None, returned_objects=[], key="itinerary_map")
+                st.markdown("---")
 
-        # Display each day in a split layout
-        for day in itinerary:
-            st.markdown(
-                f"""
-                <div style="margin-top: 40px;">
-                    <h2 style="font-size: 28px; font-weight: 700;">🥇 Day {day.get('day', '?')}</h2>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
-
-            col1, col2 = st.columns([1.3, 1])
-
-            with col1:
-                for act in day.get("activities", []):
-                    place = act.get("place_name", "Unknown Place")
-                    time_slot = act.get("time", "")
-                    desc = act.get("description", "")
-                    category = act.get("category", "")
-                    maps_url = f"https://www.google.com/maps/search/?api=1&query={quote(place + ', ' + city)}"
-
-                    st.markdown(
-                        f"""
-                        <div style="
-                            background-color: #1e1e1e;
-                            border-radius: 12px;
-                            padding: 16px;
-                            margin-bottom: 15px;
-                            border: 1px solid #333;
-                        ">
-                            <div style="color: #bbb; font-size: 13px;">🕒 {time_slot}</div>
-                            <div style="font-size: 17px; font-weight: 600; margin-top: 2px;">
-                                <a href="{maps_url}" target="_blank" style="color: #4da3ff; text-decoration: none;">
-                                    {place}
-                                </a>
-                            </div>
-                            <div style="color: #ccc; margin-top: 5px;">{desc}</div>
-                            <div style="color: #00bfff; font-size: 13px; margin-top: 5px;">
-                                🏷️ {category}
-                            </div>
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-
-                if day.get("notes"):
-                    st.markdown(
-                        f"""
-                        <div style="
-                            background-color: #102A43;
-                            border-left: 5px solid #00BFFF;
-                            color: #E6F1FF;
-                            padding: 12px;
-                            border-radius: 10px;
-                            margin-top: 10px;
-                        ">
-                            💡 {day['notes']}
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
-
-            with col2:
-                display_map_day(day, city)
-
-            st.markdown("---")
+        status.success(f"🎉 Your {days}-day itinerary for **{city}** is ready!")